@@ -41,10 +41,10 @@ quadrature = False
 nf = 48
 
 if quadrature:
-    cal_dtype = [("frequency", np.float), ("amplitude", np.float), ("phase", np.float)]
+    cal_dtype = [("frequency", np.float64), ("amplitude", np.float64), ("phase", np.float64)]
 
 else:
-    cal_dtype = [("frequency", np.float), ("real", np.float), ("imaginary", np.float)]
+    cal_dtype = [("frequency", np.float64), ("real", np.float64), ("imaginary", np.float64)]
 
 
 # =============================================================================
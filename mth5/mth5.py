@@ -23,6 +23,7 @@ import os
 import datetime
 import time
 import json
+import operator
 import dateutil
 
 import h5py
@@ -33,6 +34,24 @@ import numpy as np
 #  global parameters
 # =============================================================================
 dt_fmt = "%Y-%m-%dT%H:%M:%S.%f %Z"
+### target size of a compressed chunk in bytes, ~1 MB keeps the chunk index
+### small for long time series while still reading in reasonable blocks
+chunk_size_bytes = 2 ** 20
+### field notes object prefix for each channel type, keyed by the first
+### letter of the component
+channel_prefix_dict = {"e": "electrode", "h": "magnetometer"}
+### old channel attribute names that differ in the field notes objects
+channel_attr_dict = {"num": "chn_num", "sensor": "id"}
+### channel components with metadata in the field notes
+channel_components = frozenset(["ex", "ey", "hx", "hy", "hz"])
+### old station keys that map to a single attribute as (object getter, attr)
+station_attr_dict = {
+    "instrument_id": (operator.attrgetter("field_notes.data_logger"), "id"),
+    "quality": (operator.attrgetter("field_notes.data_quality"), "rating"),
+    "notes": (operator.attrgetter("field_notes.data_quality"), "comments"),
+    "station": (operator.attrgetter("site"), "id"),
+    "units": (operator.attrgetter("site"), "elev_units"),
+}
 
 # ==============================================================================
 # Need a dummy utc time zone for the date time format
@@ -52,6 +71,43 @@ class UTC(datetime.tzinfo):
         return "UTC"
 
 
+### the time zone holds no state so a single instance can be shared
+utc = UTC()
+
+
+def parse_utc_datetime(date_time_str):
+    """
+    parse a date-time string into a datetime object.  If the string does
+    not have a time zone it is assumed to be UTC.
+
+    :param date_time_str: date-time string, preferably ISO format
+    :type date_time_str: string
+
+    :returns: time zone aware datetime, None if date_time_str is None
+    :rtype: datetime.datetime
+    """
+    ### unset dates are written to json as null, pass them through
+    if date_time_str is None:
+        return None
+
+    ### most strings are ISO format (including the dt_fmt written by this
+    ### module), fromisoformat is much faster than the dateutil parser
+    ### which has to guess the format.  Anything with an offset or that
+    ### does not parse falls back to dateutil.
+    try:
+        dt = datetime.datetime.fromisoformat(
+            date_time_str.replace(" UTC", "").rstrip("Z")
+        )
+        if dt.tzinfo is not None:
+            dt = dateutil.parser.parse(date_time_str)
+    except (ValueError, AttributeError):
+        dt = dateutil.parser.parse(date_time_str)
+    if dt.tzname() is None:
+        dt = dt.replace(tzinfo=utc)
+
+    return dt
+
+
 class Generic(object):
     """
     A generic class that is common to most of the Metadata objects
@@ -70,9 +126,8 @@ class Generic(object):
         """
         return a dictionary
         """
-        rdict = {}
-        for key, value in self.__dict__.items():
-            rdict[f"{self.__class__.__name__}.{key}"] = value
+        prefix = self.__class__.__name__
+        rdict = {f"{prefix}.{key}": value for key, value in self.__dict__.items()}
 
         return rdict
 
@@ -327,6 +382,25 @@ class Site(Location):
 
     """
 
+    ### attributes written to json, the same for every site
+    _attrs_list = (
+        "acquired_by",
+        "start_date",
+        "stop_date",
+        "id",
+        "survey",
+        "latitude",
+        "longitude",
+        "elevation",
+        "datum",
+        "declination",
+        "declination_epoch",
+        "elev_units",
+        "coordinate_system",
+    )
+    ### same attributes as a set for fast membership tests
+    _attrs_set = frozenset(_attrs_list)
+
     def __init__(self, **kwargs):
         super(Site, self).__init__()
         self.acquired_by = Person()
@@ -334,21 +408,6 @@ class Site(Location):
         self._stop_date = None
         self.id = None
         self.survey = None
-        self._attrs_list = [
-            "acquired_by",
-            "start_date",
-            "stop_date",
-            "id",
-            "survey",
-            "latitude",
-            "longitude",
-            "elevation",
-            "datum",
-            "declination",
-            "declination_epoch",
-            "elev_units",
-            "coordinate_system",
-        ]
 
         for key, value in kwargs.items():
             setattr(self, key, value)
@@ -362,9 +421,7 @@ class Site(Location):
 
     @start_date.setter
     def start_date(self, start_date):
-        self._start_date = dateutil.parser.parse(start_date)
-        if self._start_date.tzname() is None:
-            self._start_date = self._start_date.replace(tzinfo=UTC())
+        self._start_date = parse_utc_datetime(start_date)
 
     @property
     def stop_date(self):
@@ -375,9 +432,7 @@ class Site(Location):
 
     @stop_date.setter
     def stop_date(self, stop_date):
-        self._stop_date = dateutil.parser.parse(stop_date)
-        if self._stop_date.tzname() is None:
-            self._stop_date = self._stop_date.replace(tzinfo=UTC())
+        self._stop_date = parse_utc_datetime(stop_date)
 
 
 # ==============================================================================
@@ -404,22 +459,24 @@ class FieldNotes(Generic):
     >>> FieldNotes(**{'electrode_ex':'Ag-AgCl 213', 'magnetometer_hx':'102'})
     """
 
+    ### default channel attributes, shared by all instances and only read
+    _electric_channel = {
+        "length": None,
+        "azimuth": None,
+        "chn_num": None,
+        "units": "mV",
+        "gain": 1,
+        "contact_resistance": 1,
+    }
+    _magnetic_channel = {
+        "azimuth": None,
+        "chn_num": None,
+        "units": "mV",
+        "gain": 1,
+    }
+
     def __init__(self, **kwargs):
         super(FieldNotes, self).__init__()
-        self._electric_channel = {
-            "length": None,
-            "azimuth": None,
-            "chn_num": None,
-            "units": "mV",
-            "gain": 1,
-            "contact_resistance": 1,
-        }
-        self._magnetic_channel = {
-            "azimuth": None,
-            "chn_num": None,
-            "units": "mV",
-            "gain": 1,
-        }
 
         self.data_quality = DataQuality()
         self.data_logger = Instrument()
@@ -725,6 +782,20 @@ class Schedule(object):
           ===================== =======================================
     """
 
+    ### components and attributes written to the file, the same for every
+    ### schedule
+    _comp_list = ("ex", "ey", "hx", "hy", "hz")
+    _attrs_list = (
+        "name",
+        "start_time",
+        "stop_time",
+        "start_seconds_from_epoch",
+        "stop_seconds_from_epoch",
+        "n_samples",
+        "n_channels",
+        "sampling_rate",
+    )
+
     def __init__(self, name=None, meta_df=None):
 
         self.ex = None
@@ -735,18 +806,6 @@ class Schedule(object):
         self.dt_index = None
         self.name = name
 
-        self._comp_list = ["ex", "ey", "hx", "hy", "hz"]
-        self._attrs_list = [
-            "name",
-            "start_time",
-            "stop_time",
-            "start_seconds_from_epoch",
-            "stop_seconds_from_epoch",
-            "n_samples",
-            "n_channels",
-            "sampling_rate",
-        ]
-
         self.meta_keys = [
             "station",
             "latitude",
@@ -922,9 +981,10 @@ class Schedule(object):
                 entry.pop("Dipole_Length")
             for key, value in entry.items():
                 meta_dict[f"{comp}_{translator[key]}"] = value
-            meta_dict[f"{comp}_nsamples"] = getattr(self, comp).size
+            comp_data = getattr(self, comp)
+            meta_dict[f"{comp}_nsamples"] = comp_data.size
             meta_dict[f"{comp}_ndiff"] = 0
-            meta_dict[f"{comp}_std"] = getattr(self, comp).std()
+            meta_dict[f"{comp}_std"] = comp_data.std()
             meta_dict[f"{comp}_start"] = start
         meta_dict["station"] = f"{ascii_object.SurveyID}{ascii_object.SiteID}"
         meta_dict["latitude"] = ascii_object.SiteLatitude
@@ -983,9 +1043,7 @@ class Schedule(object):
         write metadata to a csv file
         """
         if self.meta_df is None:
-            self.meta_df = pd.Series(
-                dict([(k, getattr(self, k)) for k in self._attrs_list])
-            )
+            self.meta_df = pd.Series({k: getattr(self, k) for k in self._attrs_list})
         csv_fn = self._make_csv_fn(csv_dir)
         self.meta_df.to_csv(csv_fn, header=False)
 
@@ -1025,6 +1083,17 @@ class Calibration(Generic):
         * units
     """
 
+    ### data columns and attributes written to the file, the same for every
+    ### calibration
+    _col_list = ("frequency", "real", "imaginary")
+    _attrs_list = (
+        "name",
+        "instrument_id",
+        "units",
+        "calibration_date",
+        "calibration_person",
+    )
+
     def __init__(self, name=None):
         super(Calibration, self).__init__()
         self.name = name
@@ -1035,14 +1104,6 @@ class Calibration(Generic):
         self.frequency = None
         self.real = None
         self.imaginary = None
-        self._col_list = ["frequency", "real", "imaginary"]
-        self._attrs_list = [
-            "name",
-            "instrument_id",
-            "units",
-            "calibration_date",
-            "calibration_person",
-        ]
 
     def from_dataframe(self, cal_dataframe, name=None):
         """
@@ -1126,9 +1187,7 @@ class Calibration(Generic):
         else:
             cal_df = pd.read_csv(cal_csv, names=self._col_list)
 
-        if name is not None:
-            self.name
-        self.from_dataframe(cal_df)
+        self.from_dataframe(cal_df, name=name)
 
 
 # =============================================================================
@@ -1205,7 +1264,7 @@ class MTH5(object):
 
     >>> import numpy as np
     >>> cal = mth5.Calibration()
-    >>> cal_dtype = [(name, np.float) for name in ['frequency', 'real', 'imaginary']]
+    >>> cal_dtype = [(name, np.float64) for name in ['frequency', 'real', 'imaginary']]
     >>> cal.from_numpy_array(np.zeros(20), dtype=cal_dtype)
     >>> cal.frequency = np.logspace(-3, 3, 20)
     >>> cal.real = np.random.random(20)
@@ -1255,16 +1314,23 @@ class MTH5(object):
                 return False
         return False
 
-    def open_mth5(self, mth5_fn):
+    def open_mth5(self, mth5_fn, **kwargs):
         """
         write an mth5 file
+
+        :param str mth5_fn: full path to mth5 file
+
+        :param kwargs: keyword arguments passed on to h5py.File, for example
+                       libver="latest" or fs_strategy="page" with
+                       HDF5 1.10+ for less fragmented files, or rdcc_nbytes
+                       to set the chunk cache size of each dataset
         """
         self.mth5_fn = mth5_fn
 
         if os.path.isfile(self.mth5_fn):
             print("*** Overwriting {0}".format(mth5_fn))
 
-        self.mth5_obj = h5py.File(self.mth5_fn, "w")
+        self.mth5_obj = h5py.File(self.mth5_fn, "w", **kwargs)
         self.mth5_obj.create_group("calibrations")
 
     def close_mth5(self):
@@ -1286,8 +1352,19 @@ class MTH5(object):
             * software
         """
         if self.h5_is_write():
-            for attr in ["site", "field_notes", "copyright", "provenance", "software"]:
-                self.mth5_obj.attrs.update(getattr(self, attr).to_dict())
+            ### write all the attributes in one update rather than one at a time
+            self.mth5_obj.attrs.update(
+                {
+                    attr: getattr(self, attr).to_json()
+                    for attr in [
+                        "site",
+                        "field_notes",
+                        "copyright",
+                        "provenance",
+                        "software",
+                    ]
+                }
+            )
 
     def add_schedule(self, schedule_obj, compress=True):
         """
@@ -1315,11 +1392,14 @@ class MTH5(object):
             ### add datasets for each channel
             for comp in schedule_obj.comp_list:
                 if compress:
+                    data = getattr(schedule_obj, comp)
                     schedule.create_dataset(
                         comp.lower(),
-                        data=getattr(schedule_obj, comp),
+                        data=data,
+                        chunks=get_chunk_shape(data),
                         compression="gzip",
-                        compression_opts=9,
+                        compression_opts=4,
+                        shuffle=True,
                     )
                 else:
                     schedule.create_dataset(
@@ -1370,11 +1450,14 @@ class MTH5(object):
             cal.attrs["metadata"] = calibration_obj.to_json()
             for col in calibration_obj._col_list:
                 if compress:
+                    data = getattr(calibration_obj, col)
                     cal.create_dataset(
                         col.lower(),
-                        data=getattr(calibration_obj, col),
+                        data=data,
+                        chunks=get_chunk_shape(data),
                         compression="gzip",
-                        compression_opts=9,
+                        compression_opts=4,
+                        shuffle=True,
                     )
                 else:
                     cal.create_dataset(col.lower(), data=getattr(calibration_obj, col))
@@ -1415,16 +1498,18 @@ class MTH5(object):
         """
 
         for key in self.__dict__.keys():
-            if "sch" in key:
+            if key.startswith("sch"):
                 for attr in getattr(self, key)._attrs_list:
                     value = getattr(getattr(self, key), attr)
                     self.mth5_obj[key].attrs[attr] = value
 
-    def read_mth5(self, mth5_fn):
+    def read_mth5(self, mth5_fn, **kwargs):
         """
         Read MTH5 file and update attributes
         
         :param str mth5_fn: full path to mth5 file
+
+        :param kwargs: keyword arguments passed on to h5py.File
         """
 
         if not os.path.isfile(mth5_fn):
@@ -1433,15 +1518,15 @@ class MTH5(object):
         self.mth5_fn = mth5_fn
         ### read in file and give write permissions in case the user wants to
         ### change any parameters
-        self.mth5_obj = h5py.File(self.mth5_fn, "r+")
+        self.mth5_obj = h5py.File(self.mth5_fn, "r+", **kwargs)
         for attr in ["site", "field_notes", "copyright", "provenance", "software"]:
             getattr(self, attr).from_json(self.mth5_obj.attrs[attr])
 
         for key in self.mth5_obj.keys():
-            if "sch" in key:
+            if key.startswith("sch"):
                 setattr(self, key, Schedule())
                 getattr(self, key).from_mth5(self.mth5_obj, key)
-            elif "cal" in key:
+            elif key.startswith("cal"):
                 try:
                     for ckey in self.mth5_obj[key].keys():
                         m_attr = "calibration_{0}".format(ckey)
@@ -1485,42 +1570,47 @@ class MTH5(object):
             field_notes.data_logger.type = 32-Bit 5-channel GPS synced
         """
         usgs_str = "U.S. Geological Survey"
-        # read in the configuration file
+        # read in the configuration file a line at a time
         with open(mth5_cfg_fn, "r") as fid:
-            lines = fid.readlines()
-
-        for line in lines:
-            # skip comment lines
-            if line.find("#") == 0 or len(line.strip()) < 2:
-                continue
-            # make a key = value pair
-            key, value = [item.strip() for item in line.split("=", 1)]
-
-            if value == "usgs_str":
-                value = usgs_str
-            if value.find("[") >= 0 and value.find("]") >= 0 and value.find("<") != 0:
-                value = value.replace("[", "").replace("]", "")
-                value = [v.strip() for v in value.split(",")]
-            if value.find(".") > 0:
-                try:
-                    value = float(value)
-                except ValueError:
-                    pass
-            else:
-                try:
-                    value = int(value)
-                except ValueError:
-                    pass
-
-            # if there is a dot, meaning an object with an attribute separate
-            if key.count(".") == 0:
-                setattr(self, key, value)
-            elif key.count(".") == 1:
-                obj, obj_attr = key.split(".")
-                setattr(getattr(self, obj), obj_attr, value)
-            elif key.count(".") == 2:
-                obj, obj_attr_01, obj_attr_02 = key.split(".")
-                setattr(getattr(getattr(self, obj), obj_attr_01), obj_attr_02, value)
+            for line in fid:
+                # skip comment lines
+                if line.startswith("#") or len(line.strip()) < 2:
+                    continue
+                # make a key = value pair
+                key, value = [item.strip() for item in line.split("=", 1)]
+
+                if value == "usgs_str":
+                    value = usgs_str
+                if (
+                    value.find("[") >= 0
+                    and value.find("]") >= 0
+                    and value.find("<") != 0
+                ):
+                    value = value.replace("[", "").replace("]", "")
+                    value = [v.strip() for v in value.split(",")]
+                if value.find(".") > 0:
+                    try:
+                        value = float(value)
+                    except ValueError:
+                        pass
+                else:
+                    try:
+                        value = int(value)
+                    except ValueError:
+                        pass
+
+                # if there is a dot, meaning an object with an attribute separate
+                key_list = key.split(".")
+                if len(key_list) == 1:
+                    setattr(self, key, value)
+                elif len(key_list) == 2:
+                    obj, obj_attr = key_list
+                    setattr(getattr(self, obj), obj_attr, value)
+                elif len(key_list) == 3:
+                    obj, obj_attr_01, obj_attr_02 = key_list
+                    setattr(
+                        getattr(getattr(self, obj), obj_attr_01), obj_attr_02, value
+                    )
 
     def update_metadata_from_series(self, station_series, update_time=False):
         """
@@ -1570,7 +1660,7 @@ class MTH5(object):
 
         for key in station_series.index:
             value = getattr(station_series, key)
-            if key in self.site._attrs_list:
+            if key in Site._attrs_set:
                 setattr(self.site, key, value)
             elif key == "start_date":
                 if not update_time:
@@ -1582,35 +1672,47 @@ class MTH5(object):
                     continue
                 attr = "end_date"
                 setattr(self.site, attr, value)
-            elif key == "instrument_id":
-                self.field_notes.data_logger.id = value
-            elif key == "quality":
-                self.field_notes.data_quality.rating = value
-            elif key == "notes":
-                self.field_notes.data_quality.comments = value
-            elif key == "station":
-                self.site.id = value
-            elif key == "units":
-                self.site.elev_units = value
-            elif key[0:2] in ["ex", "ey", "hx", "hy", "hz"]:
+            elif key in station_attr_dict:
+                get_obj, attr = station_attr_dict[key]
+                setattr(get_obj(self), attr, value)
+            elif key[0:2] in channel_components:
                 comp = key[0:2]
                 attr = key.split("_")[1]
-                if attr == "num":
-                    attr = "chn_num"
-                if attr == "sensor":
-                    attr = "id"
-                if "e" in comp:
-                    setattr(
-                        getattr(self.field_notes, "electrode_{0}".format(comp)),
-                        attr,
-                        value,
-                    )
-                elif "h" in comp:
-                    setattr(
-                        getattr(self.field_notes, "magnetometer_{0}".format(comp)),
-                        attr,
-                        value,
-                    )
+                attr = channel_attr_dict.get(attr, attr)
+                setattr(
+                    getattr(
+                        self.field_notes,
+                        "{0}_{1}".format(channel_prefix_dict[comp[0]], comp),
+                    ),
+                    attr,
+                    value,
+                )
+
+
+# =============================================================================
+#  HDF5 dataset helpers
+# =============================================================================
+def get_chunk_shape(data, chunk_bytes=chunk_size_bytes):
+    """
+    get a chunk shape for a 1-D dataset so that each chunk is about
+    chunk_bytes in size.  h5py guesses small chunks for long time series
+    which makes the chunk index large and reads slow.
+
+    :param data: data that will be written to the dataset
+    :type data: np.ndarray or pandas.Series
+
+    :param chunk_bytes: target size of a chunk in bytes
+    :type chunk_bytes: int
+
+    :returns: chunk shape, None for empty data so h5py can decide
+    :rtype: tuple
+    """
+    data = np.asarray(data)
+    if data.size == 0:
+        return None
+    n_chunk = max(1, int(chunk_bytes // data.dtype.itemsize))
+
+    return (min(data.shape[0], n_chunk),)
 
 
 # =============================================================================
@@ -1622,25 +1724,11 @@ class NumpyEncoder(json.JSONEncoder):
     """
 
     def default(self, obj):
-        if isinstance(
-            obj,
-            (
-                np.int_,
-                np.intc,
-                np.intp,
-                np.int8,
-                np.int16,
-                np.int32,
-                np.int64,
-                np.uint8,
-                np.uint16,
-                np.uint32,
-                np.uint64,
-            ),
-        ):
+        ### the abstract numpy scalar types cover all the sized ints/floats
+        if isinstance(obj, np.integer):
             return int(obj)
 
-        elif isinstance(obj, (np.float_, np.float16, np.float32, np.float64)):
+        elif isinstance(obj, np.floating):
             return float(obj)
 
         elif isinstance(obj, (np.ndarray)):
@@ -1649,6 +1737,20 @@ class NumpyEncoder(json.JSONEncoder):
         return json.JSONEncoder.default(self, obj)
 
 
+### classes whose attributes are listed in _attrs_list
+attrs_list_types = (Site, Calibration)
+### classes whose public attributes are everything in __dict__
+dict_types = (
+    FieldNotes,
+    Instrument,
+    DataQuality,
+    Citation,
+    Provenance,
+    Person,
+    Software,
+)
+
+
 def to_json(obj):
     """
     write a json string from a given object, taking into account other class
@@ -1656,41 +1758,30 @@ def to_json(obj):
 
     :param obj: class object to transform into string
     """
-    if isinstance(obj, (Site, Calibration)):
+    if isinstance(obj, attrs_list_types):
         keys = obj._attrs_list
     else:
         keys = obj.__dict__.keys()
 
     obj_dict = {}
     for key in keys:
-        if key.find("_") == 0:
+        if key.startswith("_"):
             continue
         value = getattr(obj, key)
 
-        if isinstance(
-            value,
-            (
-                FieldNotes,
-                Instrument,
-                DataQuality,
-                Citation,
-                Provenance,
-                Person,
-                Software,
-            ),
-        ):
-            obj_dict[key] = {}
-            for o_key, o_value in value.__dict__.items():
-                if o_key.find("_") == 0:
-                    continue
-                obj_dict[key][o_key] = o_value
-
-        elif isinstance(value, (Site, Calibration)):
-            obj_dict[key] = {}
-            for o_key in value._attrs_list:
-                if o_key.find("_") == 0:
-                    continue
-                obj_dict[key][o_key] = getattr(obj, o_key)
+        if isinstance(value, dict_types):
+            obj_dict[key] = {
+                o_key: o_value
+                for o_key, o_value in value.__dict__.items()
+                if not o_key.startswith("_")
+            }
+
+        elif isinstance(value, attrs_list_types):
+            obj_dict[key] = {
+                o_key: getattr(obj, o_key)
+                for o_key in value._attrs_list
+                if not o_key.startswith("_")
+            }
         else:
             obj_dict[key] = value
 
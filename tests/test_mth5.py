@@ -578,9 +578,9 @@ class TestCalibration(unittest.TestCase):
         cal = np.zeros(
             20,
             dtype=[
-                ("frequency", np.float),
-                ("real", np.float),
-                ("imaginary", np.float),
+                ("frequency", np.float64),
+                ("real", np.float64),
+                ("imaginary", np.float64),
             ],
         )
         self.calibration_obj.from_numpy_array(cal)
@@ -597,6 +597,33 @@ class TestCalibration(unittest.TestCase):
         self.assertEqual(self.calibration_obj.real.shape[0], 20)
         self.assertEqual(self.calibration_obj.imaginary.shape[0], 20)
 
+    def test_from_csv(self):
+        cal_fn = "../examples/example_cal.csv"
+        np.savetxt(cal_fn, np.random.random((20, 3)), delimiter=",")
+        self.calibration_obj.from_csv(cal_fn, name="x")
+        os.remove(cal_fn)
+
+        self.assertEqual(self.calibration_obj.frequency.shape[0], 20)
+        self.assertEqual(self.calibration_obj.name, "x")
+
+
+class TestChunkShape(unittest.TestCase):
+    """
+    test chunk shape of compressed datasets
+    """
+
+    def test_empty(self):
+        self.assertIsNone(mth5.get_chunk_shape(np.array([])))
+
+    def test_short(self):
+        self.assertEqual(mth5.get_chunk_shape(np.zeros(100)), (100,))
+
+    def test_long(self):
+        data = np.zeros(10 * mth5.chunk_size_bytes, dtype=np.float64)
+        chunk_shape = mth5.get_chunk_shape(data)
+        self.assertEqual(chunk_shape, (mth5.chunk_size_bytes // 8,))
+        self.assertEqual(chunk_shape[0] * data.itemsize, mth5.chunk_size_bytes)
+
 
 class TestBuildMTHD5(unittest.TestCase):
     """
@@ -634,6 +661,14 @@ class TestBuildMTHD5(unittest.TestCase):
 
         self.mth5_obj.add_schedule(schedule_obj)
         self.assertTrue(hasattr(self.mth5_obj, "schedule_01") is True)
+        self.assertEqual(
+            self.mth5_obj.mth5_obj["schedule_01"]["ex"].chunks,
+            mth5.get_chunk_shape(schedule_obj.ex),
+        )
+        self.assertEqual(
+            self.mth5_obj.mth5_obj["schedule_01"]["ex"].chunks,
+            (mth5.chunk_size_bytes // 8,),
+        )
         self.mth5_obj.close_mth5()
         self.mth5_obj.read_mth5(MTH5_FN)
         self.assertTrue(hasattr(self.mth5_obj, "schedule_01") is True)
@@ -642,6 +677,21 @@ class TestBuildMTHD5(unittest.TestCase):
         self.assertEqual(self.mth5_obj.schedule_01.sampling_rate, sr)
         self.mth5_obj.close_mth5()
 
+    def test_write_read_round_trip(self):
+        rt_fn = "../examples/example_round_trip.mth5"
+        self.mth5_obj.open_mth5(rt_fn)
+        self.mth5_obj.site.id = "round trip"
+        self.mth5_obj.write_metadata()
+        self.mth5_obj.close_mth5()
+
+        rt_obj = mth5.MTH5()
+        rt_obj.read_mth5(rt_fn)
+        self.assertEqual(rt_obj.site.id, "round trip")
+        self.assertIsNone(rt_obj.site.start_date)
+        self.assertIsNone(rt_obj.site.stop_date)
+        rt_obj.close_mth5()
+        os.remove(rt_fn)
+
 
 #    def test_update_schedule_sampling_rate(self):
 #        self.mth5_obj.read_mth5(MTH5_FN)
@@ -229,7 +229,7 @@ class EMTFStats(object):
         edi_list = glob.glob("{0}\*.edi".format(self.tf_dir))
 
         stat_array = np.zeros(
-            len(edi_list), dtype=[(key, np.float) for key in sorted(self.types)]
+            len(edi_list), dtype=[(key, np.float64) for key in sorted(self.types)]
         )
         station_list = []
         for kk, edi in enumerate(edi_list):
@@ -412,7 +412,7 @@ class EMTFStats(object):
         ### make a copy of the data fram to put quality factors in
         qual_df = pd.DataFrame(
             np.zeros(
-                stat_df.shape[0], dtype=[(key, np.float) for key in sorted(self.types)]
+                stat_df.shape[0], dtype=[(key, np.float64) for key in sorted(self.types)]
             ),
             index=stat_df.index,
         )
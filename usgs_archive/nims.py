@@ -16,9 +16,9 @@ Created on Thu Oct 31 10:03:20 2019
 # =============================================================================
 import os
 import numpy as np
-import struct
 import datetime
 import dateutil
+import functools
 
 import pandas as pd
 import logging
@@ -51,6 +51,27 @@ class ResponseError(Exception):
     pass
 
 
+# =============================================================================
+# helper functions
+# =============================================================================
+@functools.lru_cache(maxsize=4096)
+def _parse_gps_date_time(gps_date, gps_time):
+    """
+    parse a GPS date (ddmmyy) and time (hhmmss) into a datetime object.
+
+    Consecutive GPS stamps share the same date and often the same time, so
+    the parsed values are cached.  Well formed stamps are parsed with
+    strptime, anything else falls back to dateutil.
+    """
+    gps_date_time = "{0} {1}".format(gps_date, gps_time)
+    if len(gps_date) == 6 and len(gps_time) == 6:
+        try:
+            return datetime.datetime.strptime(gps_date_time, "%d%m%y %H%M%S")
+        except ValueError:
+            pass
+    return dateutil.parser.parse(gps_date_time, dayfirst=True)
+
+
 # =============================================================================
 # class objects
 # =============================================================================
@@ -67,6 +88,80 @@ class GPS(object):
               Should use GPRMC for accurate date/time information.  
     """
 
+    ### accepted values for validation, sets so checks are a hash lookup
+    _gps_types = frozenset(["gpgga", "gprmc"])
+    _gps_type_tokens = (("gpg", "GPGGA"), ("gpr", "GPRMC"))
+    _latitude_hemispheres = frozenset(["n", "s"])
+    _longitude_hemispheres = frozenset(["e", "w"])
+    ### map zeros to the end character '*' when cleaning up a stamp
+    _gps_string_table = bytes.maketrans(b"\x00", b"*")
+
+    ### index of each value in the GPS string, same for every stamp so
+    ### only built once
+    type_dict = {
+        "gprmc": {
+            0: "type",
+            1: "time",
+            2: "fix",
+            3: "latitude",
+            4: "latitude_hemisphere",
+            5: "longitude",
+            6: "longitude_hemisphere",
+            7: "skip",
+            8: "skip",
+            9: "date",
+            10: "declination",
+            11: "declination_hemisphere",
+            "length": [12],
+            "type": 0,
+            "time": 1,
+            "fix": 2,
+            "latitude": 3,
+            "latitude_hemisphere": 4,
+            "longitude": 5,
+            "longitude_hemisphere": 6,
+            "date": 9,
+            "declination": 10,
+        },
+        "gpgga": {
+            0: "type",
+            1: "time",
+            2: "latitude",
+            3: "latitude_hemisphere",
+            4: "longitude",
+            5: "longitude_hemisphere",
+            6: "var_01",
+            7: "var_02",
+            8: "var_03",
+            9: "elevation",
+            10: "elevation_units",
+            11: "elevation_error",
+            12: "elevation_error_units",
+            13: "null_01",
+            14: "null_02",
+            "length": [14, 15],
+            "type": 0,
+            "time": 1,
+            "latitude": 2,
+            "latitude_hemisphere": 3,
+            "longitude": 4,
+            "longitude_hemisphere": 5,
+            "elevation": 9,
+            "elevation_units": 10,
+            "elevation_error": 11,
+            "elevation_error_units": 12,
+        },
+    }
+    ### private attribute name for each index in the GPS string
+    _attr_name_dict = {
+        g_type: {
+            index: "_{0}".format(name)
+            for index, name in index_dict.items()
+            if isinstance(index, int)
+        }
+        for g_type, index_dict in type_dict.items()
+    }
+
     def __init__(self, gps_string, index=0):
 
         self.gps_string = gps_string
@@ -82,61 +177,6 @@ class GPS(object):
         self._elevation = None
         self.valid = False
         self.elevation_units = "meters"
-
-        self.type_dict = {
-            "gprmc": {
-                0: "type",
-                1: "time",
-                2: "fix",
-                3: "latitude",
-                4: "latitude_hemisphere",
-                5: "longitude",
-                6: "longitude_hemisphere",
-                7: "skip",
-                8: "skip",
-                9: "date",
-                10: "declination",
-                11: "declination_hemisphere",
-                "length": [12],
-                "type": 0,
-                "time": 1,
-                "fix": 2,
-                "latitude": 3,
-                "latitude_hemisphere": 4,
-                "longitude": 5,
-                "longitude_hemisphere": 6,
-                "date": 9,
-                "declination": 10,
-            },
-            "gpgga": {
-                0: "type",
-                1: "time",
-                2: "latitude",
-                3: "latitude_hemisphere",
-                4: "longitude",
-                5: "longitude_hemisphere",
-                6: "var_01",
-                7: "var_02",
-                8: "var_03",
-                9: "elevation",
-                10: "elevation_units",
-                11: "elevation_error",
-                12: "elevation_error_units",
-                13: "null_01",
-                14: "null_02",
-                "length": [14, 15],
-                "type": 0,
-                "time": 1,
-                "latitude": 2,
-                "latitude_hemisphere": 3,
-                "longitude": 4,
-                "longitude_hemisphere": 5,
-                "elevation": 9,
-                "elevation_units": 10,
-                "elevation_error": 11,
-                "elevation_error_units": 12,
-            },
-        }
         self.parse_gps_string(self.gps_string)
 
     def validate_gps_string(self, gps_string):
@@ -148,22 +188,19 @@ class GPS(object):
         
         :returns: validated string or None if there is something wrong
         """
-        for replace_str in [b"\xd9", b"\xc7", b"\xcc"]:
-            gps_string = gps_string.replace(replace_str, b"")
-
-        ### sometimes the end is set with a zero for some reason
-        gps_string = gps_string.replace(b"\x00", b"*")
+        ### drop the binary characters that show up in stamps and
+        ### sometimes the end is set with a zero for some reason, do both in
+        ### a single pass over the string
+        gps_string = gps_string.translate(self._gps_string_table, b"\xd9\xc7\xcc")
 
         if gps_string.find(b"*") < 0:
-            logging.error("GPSError: No end to stamp {0}".format(gps_string))
+            logging.error("GPSError: No end to stamp %s", gps_string)
         else:
             try:
                 gps_string = gps_string[0 : gps_string.find(b"*")].decode()
                 return gps_string
             except UnicodeDecodeError:
-                logging.error(
-                    "GPSError: stamp not correct format, {0}".format(gps_string)
-                )
+                logging.error("GPSError: stamp not correct format, %s", gps_string)
                 return None
 
     def parse_gps_string(self, gps_string):
@@ -188,14 +225,14 @@ class GPS(object):
         gps_list, error_list = self.validate_gps_list(gps_list)
         if len(error_list) > 0:
             for error in error_list:
-                logging.error("GPSError:" + error)
+                logging.error("GPSError:%s", error)
         if gps_list is None:
             return
 
-        attr_dict = self.type_dict[gps_list[0].lower()]
+        attr_dict = self._attr_name_dict[gps_list[0].lower()]
 
         for index, value in enumerate(gps_list):
-            setattr(self, "_" + attr_dict[index], value)
+            setattr(self, attr_dict[index], value)
 
         if None not in gps_list:
             self.valid = True
@@ -212,81 +249,78 @@ class GPS(object):
             error_list.append(error.args[0])
             return None, error_list
 
-        ### get the string type
+        ### get the string type and the index of each value for that type
         g_type = gps_list[0].lower()
+        index_dict = self.type_dict[g_type]
 
         ### first check the length, if it is not the proper length then
         ### return, cause you never know if everything else is correct
         try:
-            self._validate_list_length(gps_list)
+            self._validate_list_length(gps_list, g_type)
         except GPSError as error:
             error_list.append(error.args[0])
             return None, error_list
 
         try:
-            gps_list[self.type_dict[g_type]["time"]] = self._validate_time(
-                gps_list[self.type_dict[g_type]["time"]]
+            gps_list[index_dict["time"]] = self._validate_time(
+                gps_list[index_dict["time"]]
             )
         except GPSError as error:
             error_list.append(error.args[0])
-            gps_list[self.type_dict[g_type]["time"]] = None
+            gps_list[index_dict["time"]] = None
 
         try:
-            gps_list[self.type_dict[g_type]["latitude"]] = self._validate_latitude(
-                gps_list[self.type_dict[g_type]["latitude"]],
-                gps_list[self.type_dict[g_type]["latitude_hemisphere"]],
+            gps_list[index_dict["latitude"]] = self._validate_latitude(
+                gps_list[index_dict["latitude"]],
+                gps_list[index_dict["latitude_hemisphere"]],
             )
         except GPSError as error:
             error_list.append(error.args[0])
-            gps_list[self.type_dict[g_type]["latitude"]] = None
+            gps_list[index_dict["latitude"]] = None
 
         try:
-            gps_list[self.type_dict[g_type]["longitude"]] = self._validate_longitude(
-                gps_list[self.type_dict[g_type]["longitude"]],
-                gps_list[self.type_dict[g_type]["longitude_hemisphere"]],
+            gps_list[index_dict["longitude"]] = self._validate_longitude(
+                gps_list[index_dict["longitude"]],
+                gps_list[index_dict["longitude_hemisphere"]],
             )
         except GPSError as error:
             error_list.append(error.args[0])
-            gps_list[self.type_dict[g_type]["longitude"]] = None
+            gps_list[index_dict["longitude"]] = None
 
         if g_type == "gprmc":
             try:
-                gps_list[self.type_dict["gprmc"]["date"]] = self._validate_date(
-                    gps_list[self.type_dict["gprmc"]["date"]]
+                gps_list[index_dict["date"]] = self._validate_date(
+                    gps_list[index_dict["date"]]
                 )
             except GPSError as error:
                 error_list.append(error.args[0])
-                gps_list[self.type_dict[g_type]["date"]] = None
+                gps_list[index_dict["date"]] = None
 
         elif g_type == "gpgga":
             try:
-                gps_list[
-                    self.type_dict["gpgga"]["elevation"]
-                ] = self._validate_elevation(
-                    gps_list[self.type_dict["gpgga"]["elevation"]]
+                gps_list[index_dict["elevation"]] = self._validate_elevation(
+                    gps_list[index_dict["elevation"]]
                 )
             except GPSError as error:
                 error_list.append(error.args[0])
-                gps_list[self.type_dict["gpgga"]["elevation"]] = None
+                gps_list[index_dict["elevation"]] = None
 
         return gps_list, error_list
 
     def _validate_gps_type(self, gps_list):
         """Validate gps type should be gpgga or gprmc"""
         gps_type = gps_list[0].lower()
-        if "gpg" in gps_type:
-            if len(gps_type) > 5:
-                gps_list = ["GPGGA", gps_type[-6:]] + gps_list[1:]
-            elif len(gps_type) < 5:
-                gps_list[0] = "GPGGA"
-        elif "gpr" in gps_type:
-            if len(gps_type) > 5:
-                gps_list = ["GPRMC", gps_type[-6:]] + gps_list[1:]
-            elif len(gps_type) < 5:
-                gps_list[0] = "GPRMC"
-
-        gps_type = gps_list[0].lower()
-        if gps_type not in ["gpgga", "gprmc"]:
+        if gps_type not in self._gps_types:
+            for token, name in self._gps_type_tokens:
+                if token in gps_type:
+                    if len(gps_type) > 5:
+                        gps_list = [name, gps_type[-6:]] + gps_list[1:]
+                    elif len(gps_type) < 5:
+                        gps_list[0] = name
+                    gps_type = gps_list[0].lower()
+                    break
+
+        if gps_type not in self._gps_types:
             raise GPSError(
                 "GPS String type not correct.  "
                 + "Expect GPGGA or GPRMC, got {0}".format(gps_type.upper())
@@ -294,10 +328,12 @@ class GPS(object):
 
         return gps_list
 
-    def _validate_list_length(self, gps_list):
-        """validate gps list length based on type of string"""
+    def _validate_list_length(self, gps_list, gps_list_type):
+        """
+        validate gps list length based on type of string, gps_list_type is
+        the lower case type already checked by _validate_gps_type
+        """
 
-        gps_list_type = gps_list[0].lower()
         expected_len = self.type_dict[gps_list_type]["length"]
         if len(gps_list) not in expected_len:
             raise GPSError(
@@ -348,7 +384,7 @@ class GPS(object):
                 "Latitude hemisphere should be 1 character.  "
                 + "Got {0}".format(len(hemisphere_str))
             )
-        if hemisphere_str.lower() not in ["n", "s"]:
+        if hemisphere_str.lower() not in self._latitude_hemispheres:
             raise GPSError(
                 "Latitude hemisphere {0} not understood".format(hemisphere_str.upper())
             )
@@ -372,7 +408,7 @@ class GPS(object):
                 "Longitude hemisphere should be 1 character.  "
                 + "Got {0}".format(len(hemisphere_str))
             )
-        if hemisphere_str.lower() not in ["e", "w"]:
+        if hemisphere_str.lower() not in self._longitude_hemispheres:
             raise GPSError(
                 "Longitude hemisphere {0} not understood".format(hemisphere_str.upper())
             )
@@ -433,7 +469,8 @@ class GPS(object):
             except ValueError:
                 logging.error(
                     "GPSError: Could not get elevation GPS string"
-                    + "not complete {0}".format(self.gps_string)
+                    + "not complete %s",
+                    self.gps_string,
                 )
         else:
             return 0.0
@@ -448,11 +485,9 @@ class GPS(object):
         if self._date is None:
             self._date = "010180"
         try:
-            return dateutil.parser.parse(
-                "{0} {1}".format(self._date, self._time), dayfirst=True
-            )
+            return _parse_gps_date_time(self._date, self._time)
         except ValueError:
-            logging.error("GPSError: bad date string {0}".format(self.gps_string))
+            logging.error("GPSError: bad date string %s", self.gps_string)
             return None
 
     @property
@@ -554,7 +589,7 @@ class NIMSHeader(object):
 
         print("Reading NIMS file {0}".format(self.fn))
         logging.info("=" * 72)
-        logging.info("Reading NIMS file {0}".format(self.fn))
+        logging.info("Reading NIMS file %s", self.fn)
 
         ### load in the entire file, its not too big
         with open(self.fn, "rb") as fid:
@@ -632,17 +667,19 @@ class NIMSHeader(object):
     def _get_latitude(self, latitude, hemisphere):
         if not isinstance(latitude, float):
             latitude = float(latitude)
-        if hemisphere.lower() == "n":
+        hemisphere = hemisphere.lower()
+        if hemisphere == "n":
             return latitude
-        if hemisphere.lower() == "s":
+        if hemisphere == "s":
             return -1 * latitude
 
     def _get_longitude(self, longitude, hemisphere):
         if not isinstance(longitude, float):
             longitude = float(longitude)
-        if hemisphere.lower() == "e":
+        hemisphere = hemisphere.lower()
+        if hemisphere == "e":
             return longitude
-        if hemisphere.lower() == "w":
+        if hemisphere == "w":
             return -1 * longitude
 
 
@@ -697,12 +734,49 @@ class NIMS(NIMSHeader):
         self.ts = None
         self.gaps = None
         self.duplicate_list = None
+        ### median location computed from self.stamps, see _get_location
+        self._location = None
+        self._location_stamps = None
 
         self.indices = self._make_index_values()
 
         if self.fn is not None:
             self.read_nims()
 
+    def _get_location(self):
+        """
+        median latitude, longitude and elevation from all the GPS stamps.
+        Each channel asks for the location so compute it once and only again
+        if the stamps change.
+
+        :returns: dictionary with keys latitude, longitude, elevation
+        """
+        if self._location is not None and self._location_stamps is self.stamps:
+            return self._location
+
+        latitude = np.zeros(len(self.stamps))
+        longitude = np.zeros(len(self.stamps))
+        elevation = np.zeros(len(self.stamps))
+        for ii, stamp in enumerate(self.stamps):
+            latitude[ii] = stamp[1][0].latitude
+            longitude[ii] = stamp[1][0].longitude
+            if len(stamp[1]) == 1:
+                elev = stamp[1][0].elevation
+            if len(stamp[1]) == 2:
+                elev = stamp[1][1].elevation
+            if elev is None:
+                continue
+            elevation[ii] = elev
+
+        self._location = {
+            "latitude": np.median(latitude[np.nonzero(latitude)]),
+            "longitude": np.median(longitude[np.nonzero(longitude)]),
+            "elevation": np.median(elevation[np.nonzero(elevation)]),
+        }
+        self._location_stamps = self.stamps
+
+        return self._location
+
     @property
     def latitude(self):
         """
@@ -712,10 +786,7 @@ class NIMS(NIMSHeader):
         Only get from the GPRMC stamp as they should be duplicates
         """
         if self.stamps is not None:
-            latitude = np.zeros(len(self.stamps))
-            for ii, stamp in enumerate(self.stamps):
-                latitude[ii] = stamp[1][0].latitude
-            return np.median(latitude[np.nonzero(latitude)])
+            return self._get_location()["latitude"]
         else:
             return None
 
@@ -728,10 +799,7 @@ class NIMS(NIMSHeader):
         Only get from the first stamp within the sets
         """
         if self.stamps is not None:
-            longitude = np.zeros(len(self.stamps))
-            for ii, stamp in enumerate(self.stamps):
-                longitude[ii] = stamp[1][0].longitude
-            return np.median(longitude[np.nonzero(longitude)])
+            return self._get_location()["longitude"]
         else:
             return None
 
@@ -744,16 +812,7 @@ class NIMS(NIMSHeader):
         Only get from the first stamp within the sets
         """
         if self.stamps is not None:
-            elevation = np.zeros(len(self.stamps))
-            for ii, stamp in enumerate(self.stamps):
-                if len(stamp[1]) == 1:
-                    elev = stamp[1][0].elevation
-                if len(stamp[1]) == 2:
-                    elev = stamp[1][1].elevation
-                if elev is None:
-                    continue
-                elevation[ii] = elev
-            return np.median(elevation[np.nonzero(elevation)])
+            return self._get_location()["elevation"]
         else:
             return None
 
@@ -779,119 +838,70 @@ class NIMS(NIMSHeader):
         else:
             return None
 
+    def _make_ts_obj(self, comp, azimuth, chn_num, instrument_id, dipole_length=None):
+        """
+        make an MTTS object for a single channel, the properties below
+        only differ in these values
+
+        :param str comp: component [ hx | hy | hz | ex | ey ]
+        :param azimuth: azimuth of the channel
+        :param int chn_num: channel number
+        :param instrument_id: sensor id
+        :param dipole_length: dipole length, only for electric channels
+
+        :returns: ts.MTTS object or None if no data has been read in
+        """
+        if self.ts is None:
+            return None
+
+        ts_obj = ts.MTTS()
+        ts_obj.fn = self.fn
+        ts_obj.station = self.run_id
+        ts_obj.lat = self.latitude
+        ts_obj.lon = self.longitude
+        ts_obj.elev = self.elevation
+        ts_obj.azimuth = azimuth
+        if comp.startswith("e"):
+            ts_obj.dipole_length = dipole_length
+        ts_obj.component = comp
+        ts_obj.data_logger = self.box_id
+        ts_obj.instrument_id = instrument_id
+        ts_obj.chn_num = chn_num
+        ts_obj.sampling_rate = self.sampling_rate
+        ts_obj.ts = pd.DataFrame({"data": self.ts[comp]})
+        return ts_obj
+
     @property
     def hx(self):
         """HX"""
-        if self.ts is not None:
-            ts_obj = ts.MTTS()
-            ts_obj.fn = self.fn
-            ts_obj.station = self.run_id
-            ts_obj.lat = self.latitude
-            ts_obj.lon = self.longitude
-            ts_obj.elev = self.elevation
-            ts_obj.azimuth = 0
-            ts_obj.component = "hx"
-            ts_obj.data_logger = self.box_id
-            ts_obj.instrument_id = self.mag_id
-            ts_obj.chn_num = 1
-            ts_obj.sampling_rate = self.sampling_rate
-            ts_obj.ts = pd.DataFrame({"data": self.ts.hx})
-            return ts_obj
-        else:
-            return None
+        return self._make_ts_obj("hx", 0, 1, self.mag_id)
 
     @property
     def hy(self):
         """HY"""
-        if self.ts is not None:
-            ts_obj = ts.MTTS()
-            ts_obj.fn = self.fn
-            ts_obj.station = self.run_id
-            ts_obj.lat = self.latitude
-            ts_obj.lon = self.longitude
-            ts_obj.elev = self.elevation
-            ts_obj.azimuth = 90
-            ts_obj.component = "hy"
-            ts_obj.data_logger = self.box_id
-            ts_obj.instrument_id = self.mag_id
-            ts_obj.chn_num = 2
-            ts_obj.sampling_rate = self.sampling_rate
-            ts_obj.ts = pd.DataFrame({"data": self.ts.hy})
-            return ts_obj
-        else:
-            return None
+        return self._make_ts_obj("hy", 90, 2, self.mag_id)
 
     @property
     def hz(self):
         """HZ"""
-        if self.ts is not None:
-            ts_obj = ts.MTTS()
-            ts_obj.fn = self.fn
-            ts_obj.station = self.run_id
-            ts_obj.lat = self.latitude
-            ts_obj.lon = self.longitude
-            ts_obj.elev = self.elevation
-            ts_obj.azimuth = 90
-            ts_obj.component = "hz"
-            ts_obj.data_logger = self.box_id
-            ts_obj.instrument_id = self.mag_id
-            ts_obj.chn_num = 3
-            ts_obj.sampling_rate = self.sampling_rate
-            ts_obj.ts = pd.DataFrame({"data": self.ts.hz})
-            return ts_obj
-        else:
-            return None
+        return self._make_ts_obj("hz", 90, 3, self.mag_id)
 
     @property
     def ex(self):
         """EX"""
-        if self.ts is not None:
-            ts_obj = ts.MTTS()
-            ts_obj.fn = self.fn
-            ts_obj.station = self.run_id
-            ts_obj.lat = self.latitude
-            ts_obj.lon = self.longitude
-            ts_obj.elev = self.elevation
-            ts_obj.azimuth = self.ex_azimuth
-            ts_obj.dipole_length = self.ex_length
-            ts_obj.component = "ex"
-            ts_obj.data_logger = self.box_id
-            ts_obj.instrument_id = 1
-            ts_obj.chn_num = 4
-            ts_obj.sampling_rate = self.sampling_rate
-            ts_obj.ts = pd.DataFrame({"data": self.ts.ex})
-            return ts_obj
-        else:
-            return None
+        return self._make_ts_obj("ex", self.ex_azimuth, 4, 1, self.ex_length)
 
     @property
     def ey(self):
         """EY"""
-        if self.ts is not None:
-            ts_obj = ts.MTTS()
-            ts_obj.fn = self.fn
-            ts_obj.station = self.run_id
-            ts_obj.lat = self.latitude
-            ts_obj.lon = self.longitude
-            ts_obj.elev = self.elevation
-            ts_obj.azimuth = self.ey_azimuth
-            ts_obj.dipole_length = self.ey_length
-            ts_obj.component = "ey"
-            ts_obj.data_logger = self.box_id
-            ts_obj.instrument_id = 1
-            ts_obj.chn_num = 5
-            ts_obj.sampling_rate = self.sampling_rate
-            ts_obj.ts = pd.DataFrame({"data": self.ts.ey})
-            return ts_obj
-        else:
-            return None
+        return self._make_ts_obj("ey", self.ey_azimuth, 5, 1, self.ey_length)
 
     def _make_index_values(self):
         """
         Index values for the channels recorded
         """
         ### make an array of index values for magnetics and electrics
-        indices = np.zeros((8, 5), dtype=np.int)
+        indices = np.zeros((8, 5), dtype=np.int64)
         for kk in range(8):
             ### magnetic blocks
             for ii in range(3):
@@ -917,16 +927,16 @@ class NIMS(NIMSHeader):
         .. note:: This assumes that there are an even amount of data blocks.  
                   Might be a bad assumption          
         """
-        ### get index values of $ and gps_strings
-        index_values = []
-        gps_str_list = []
-        for ii in range(int(len(nims_string) / self.block_size)):
-            index = ii * self.block_size + 3
-            g_char = struct.unpack("c", nims_string[index : index + 1])[0]
-            if g_char == b"$":
-                index_values.append((index - 3) / self.block_size)
-            gps_str_list.append(g_char)
-        gps_raw_stamp_list = b"".join(gps_str_list).split(b"$")
+        ### the gps character is the 3rd byte of each block, so slice them
+        ### all out at once, then find the blocks that start a stamp
+        n_blocks = int(len(nims_string) / self.block_size)
+        gps_str = bytes(nims_string[3 : n_blocks * self.block_size : self.block_size])
+        index_values = (
+            np.flatnonzero(np.frombuffer(gps_str, dtype=np.uint8) == ord("$"))
+            .astype(float)
+            .tolist()
+        )
+        gps_raw_stamp_list = gps_str.split(b"$")
         return index_values, gps_raw_stamp_list
 
     def get_stamps(self, nims_string):
@@ -1024,20 +1034,20 @@ class NIMS(NIMSHeader):
                 elif index_diff == 3 or index_diff == 75:
                     index -= 1
                     stamps[0].index -= 1
-                if stamps[0].gps_type in ["GPRMC", "gprmc"]:
-                    if index_diff in [1, 2, 3]:
+                if stamps[0].gps_type in {"GPRMC", "gprmc"}:
+                    if index_diff in {1, 2, 3}:
                         gps_stamps.append((index, stamps))
                         stamp_find = True
                         del gps_list[ii]
                         break
-                elif stamps[0].gps_type in ["GPGGA", "gpgga"]:
-                    if index_diff in [73, 74, 75]:
+                elif stamps[0].gps_type in {"GPGGA", "gpgga"}:
+                    if index_diff in {73, 74, 75}:
                         gps_stamps.append((index, stamps))
                         stamp_find = True
                         del gps_list[ii]
                         break
             if not stamp_find:
-                logging.warning("No good GPS stamp at {0} seconds".format(index))
+                logging.warning("No good GPS stamp at %s seconds", index)
 
         return gps_stamps
 
@@ -1076,12 +1086,11 @@ class NIMS(NIMSHeader):
         unwrap the sequence to be sequential numbers instead of modulated by
         256.  sets the first number to 0
         """
-        count = 0
-        unwrapped = np.zeros_like(sequence)
-        for ii, seq in enumerate(sequence):
-            unwrapped[ii] = seq + count * 256
-            if seq == 255:
-                count += 1
+        ### the number of wraps before each block is the running count of
+        ### 255's up to, but not including, that block
+        count = np.zeros_like(sequence)
+        count[1:] = np.cumsum(sequence[:-1] == 255)
+        unwrapped = sequence + count * 256
 
         unwrapped -= unwrapped[0]
 
@@ -1110,13 +1119,11 @@ class NIMS(NIMSHeader):
         """
         make sure the blocks are truly duplicates
         """
-        if np.array_equal(block_01, block_02):
-            if np.array_equal(info_01, info_02):
-                return True
-            else:
-                return False
-        else:
-            return False
+        ### compare the small info records first so most non-duplicates
+        ### never get to the full data block comparison
+        return np.array_equal(info_01, info_02) and np.array_equal(
+            block_01, block_02
+        )
 
     def remove_duplicates(self, info_array, data_array):
         """
@@ -1226,8 +1233,10 @@ class NIMS(NIMSHeader):
         ### check the size of the data, should have an equal amount of blocks
         if (data.size % self.block_size) != 0:
             logging.warning(
-                "odd number of bytes {0}, not even blocks".format(data.size)
-                + "cutting down the data by {0}".format(data.size % self.block_size)
+                "odd number of bytes %s, not even blocks"
+                + "cutting down the data by %s",
+                data.size,
+                data.size % self.block_size,
             )
             end_data = data.size - (data.size % self.block_size)
             data = data[0:end_data]
@@ -1239,15 +1248,15 @@ class NIMS(NIMSHeader):
         self.info_array = np.zeros(
             data.shape[0],
             dtype=[
-                ("soh", np.int),
-                ("block_len", np.int),
-                ("status", np.int),
-                ("gps", np.int),
-                ("sequence", np.int),
-                ("elec_temp", np.float),
-                ("box_temp", np.float),
-                ("logic", np.int),
-                ("end", np.int),
+                ("soh", np.int64),
+                ("block_len", np.int64),
+                ("status", np.int64),
+                ("gps", np.int64),
+                ("sequence", np.int64),
+                ("elec_temp", np.float64),
+                ("box_temp", np.float64),
+                ("logic", np.int64),
+                ("end", np.int64),
             ],
         )
 
@@ -1267,17 +1276,17 @@ class NIMS(NIMSHeader):
         data_array = np.zeros(
             data.shape[0] * self.sampling_rate,
             dtype=[
-                ("hx", np.float),
-                ("hy", np.float),
-                ("hz", np.float),
-                ("ex", np.float),
-                ("ey", np.float),
+                ("hx", np.float64),
+                ("hy", np.float64),
+                ("hz", np.float64),
+                ("ex", np.float64),
+                ("ey", np.float64),
             ],
         )
 
         ### fill the data
         for cc, comp in enumerate(["hx", "hy", "hz", "ex", "ey"]):
-            channel_arr = np.zeros((data.shape[0], 8), dtype=np.float)
+            channel_arr = np.zeros((data.shape[0], 8), dtype=np.float64)
             for kk in range(self.sampling_rate):
                 index = self.indices[kk, cc]
                 value = (data[:, index] * 256 + data[:, index + 1]) * np.array(
@@ -1311,7 +1320,7 @@ class NIMS(NIMSHeader):
         get the first GPRMC stamp
         """
         for stamp in stamps:
-            if stamp[1][0].gps_type in ["gprmc", "GPRMC"]:
+            if stamp[1][0].gps_type in {"gprmc", "GPRMC"}:
                 return stamp
         return None
 
@@ -1320,7 +1329,7 @@ class NIMS(NIMSHeader):
         get the last gprmc stamp
         """
         for stamp in stamps[::-1]:
-            if stamp[1][0].gps_type in ["gprmc", "GPRMC"]:
+            if stamp[1][0].gps_type in {"gprmc", "GPRMC"}:
                 return stamp
         return None
 
@@ -1334,6 +1343,8 @@ class NIMS(NIMSHeader):
         :returns: list of gap index values
         """
         stamp_01 = self._get_first_gps_stamp(stamps)[1][0]
+        ### parse the reference time once, not for every stamp
+        time_stamp_01 = stamp_01.time_stamp
         diff_arr = np.zeros(len(stamps))
         diff_arr[0] = -666
         for ii, stamp in enumerate(stamps[1:], 1):
@@ -1341,7 +1352,7 @@ class NIMS(NIMSHeader):
             if stamp._date == "010180":
                 diff_arr[ii] = -666
                 continue
-            time_diff = (stamp.time_stamp - stamp_01.time_stamp).total_seconds()
+            time_diff = (stamp.time_stamp - time_stamp_01).total_seconds()
             index_diff = stamp.index - stamp_01.index
 
             diff_arr[ii] = index_diff - time_diff
@@ -1586,9 +1597,10 @@ class Response(object):
         """
 
         self.hardware = hardware
-        if "pc" in hardware.lower():
+        hardware = hardware.lower()
+        if "pc" in hardware:
             return self.electric_high_pass_pc
-        elif "hp" in hardware.lower():
+        elif "hp" in hardware:
             return self.electric_high_pass_hp
         else:
             raise ResponseError(
@@ -16,13 +16,13 @@ Created on Tue Aug 29 16:38:28 2017
 
 import os
 import time
+import functools
 import datetime
 import sys
 import glob
 from io import StringIO
 import collections
 
-import gzip
 import urllib as url
 import xml.etree.ElementTree as ET
 
@@ -31,19 +31,7 @@ import scipy.signal as sps
 import pandas as pd
 
 import mtpy.usgs.zen as zen
-import mtpy.usgs.zonge as zonge
-import mtpy.utils.gis_tools as gis_tools
-import mtpy.utils.configfile as mtcfg
-
 import mth5.mth5 as mth5
-from usgs_archive import nims
-
-# for writing shape file
-import geopandas as gpd
-from shapely.geometry import Point
-
-# science base
-import sciencebasepy as sb
 
 # =============================================================================
 # data base error
@@ -68,18 +56,122 @@ class Capturing(list):
 
 
 # ==============================================================================
-# Need a dummy utc time zone for the date time format
+# use the same dummy utc time zone as mth5 instead of redefining it here
 # ==============================================================================
-class UTC(datetime.tzinfo):
-    def utcoffset(self, df):
-        return datetime.timedelta(hours=0)
+UTC = mth5.UTC
+
 
-    def dst(self, df):
-        return datetime.timedelta(0)
+# =============================================================================
+# Metadata data types, these are built once here instead of every time an
+# empty metadata array is made
+# =============================================================================
+def _add_channel_dtypes(dtype_list, ch_dtype, skip_list=()):
+    """
+    add an entry for each channel to a list of data types and return the
+    full numpy.dtype
 
-    def tzname(self, df):
-        return "UTC"
+    :param dtype_list: list of (name, dtype) for the station entries
+    :type dtype_list: list
 
+    :param ch_dtype: data type of a single channel entry, names with 'ch'
+                     are replaced by the component, others are prefixed by
+                     the component
+    :type ch_dtype: np.dtype
+
+    :param skip_list: names in ch_dtype to skip
+    :type skip_list: tuple
+
+    :returns: data type with station and channel entries
+    :rtype: np.dtype
+    """
+    dtype_list = list(dtype_list)
+    for cc in ["ex", "ey", "hx", "hy", "hz"]:
+        for name, n_dtype in ch_dtype.fields.items():
+            if name in skip_list:
+                continue
+            elif "ch" in name:
+                m_name = name.replace("ch", cc)
+            else:
+                m_name = "{0}_{1}".format(cc, name)
+            dtype_list.append((m_name, n_dtype[0]))
+
+    return np.dtype(dtype_list)
+
+
+z3d_meta_dtype = np.dtype(
+    [
+        ("comp", "U3"),
+        ("start", np.int64),
+        ("stop", np.int64),
+        ("fn", "U140"),
+        ("sampling_rate", np.float32),
+        ("latitude", np.float32),
+        ("longitude", np.float32),
+        ("elevation", np.float32),
+        ("ch_azimuth", np.float32),
+        ("ch_length", np.float32),
+        ("ch_num", np.int32),
+        ("ch_sensor", "U10"),
+        ("n_samples", np.int32),
+        ("t_diff", np.int32),
+        ("standard_deviation", np.float32),
+        ("station", "U12"),
+    ]
+)
+
+schedule_meta_dtype = _add_channel_dtypes(
+    [
+        ("station", "U10"),
+        ("latitude", np.float64),
+        ("longitude", np.float64),
+        ("elevation", np.float64),
+        ("start", np.int64),
+        ("stop", np.int64),
+        ("sampling_rate", np.float64),
+        ("n_chan", np.int64),
+        ("n_samples", np.int64),
+        ("instrument_id", "U10"),
+        ("collected_by", "U30"),
+        ("notes", "U200"),
+        ("comp", "U24"),
+    ],
+    z3d_meta_dtype,
+    skip_list=(
+        "station",
+        "latitude",
+        "longitude",
+        "elevation",
+        "sampling_rate",
+        "comp",
+    ),
+)
+
+survey_meta_dtype = _add_channel_dtypes(
+    [
+        ("station", "U10"),
+        ("latitude", np.float64),
+        ("longitude", np.float64),
+        ("elevation", np.float64),
+        ("start", np.int64),
+        ("stop", np.int64),
+        ("sampling_rate", np.float64),
+        ("n_chan", np.int64),
+        ("instrument_id", "U10"),
+        ("collected_by", "U30"),
+        ("notes", "U200"),
+    ],
+    np.dtype(
+        [
+            ("ch_azimuth", np.float32),
+            ("ch_length", np.float32),
+            ("ch_num", np.int32),
+            ("ch_sensor", "U10"),
+            ("n_samples", np.int32),
+            ("t_diff", np.int32),
+            ("standard_deviation", np.float32),
+        ]
+    ),
+)
 
 # =============================================================================
 # Collect Z3d files
@@ -125,65 +217,13 @@ class Z3DCollection(object):
         self.meta_notes = None
         self.verbose = True
         self._pd_dt_fmt = "%Y-%m-%d %H:%M:%S.%f"
-        self._meta_dtype = np.dtype(
-            [
-                ("comp", "U3"),
-                ("start", np.int64),
-                ("stop", np.int64),
-                ("fn", "U140"),
-                ("sampling_rate", np.float32),
-                ("latitude", np.float32),
-                ("longitude", np.float32),
-                ("elevation", np.float32),
-                ("ch_azimuth", np.float32),
-                ("ch_length", np.float32),
-                ("ch_num", np.int32),
-                ("ch_sensor", "U10"),
-                ("n_samples", np.int32),
-                ("t_diff", np.int32),
-                ("standard_deviation", np.float32),
-                ("station", "U12"),
-            ]
-        )
 
     def _empty_meta_arr(self):
         """
         Create an empty pandas Series
         """
-        dtype_list = [
-            ("station", "U10"),
-            ("latitude", np.float),
-            ("longitude", np.float),
-            ("elevation", np.float),
-            ("start", np.int64),
-            ("stop", np.int64),
-            ("sampling_rate", np.float),
-            ("n_chan", np.int),
-            ("n_samples", np.int),
-            ("instrument_id", "U10"),
-            ("collected_by", "U30"),
-            ("notes", "U200"),
-            ("comp", "U24"),
-        ]
-
-        for cc in ["ex", "ey", "hx", "hy", "hz"]:
-            for name, n_dtype in self._meta_dtype.fields.items():
-                if name in [
-                    "station",
-                    "latitude",
-                    "longitude",
-                    "elevation",
-                    "sampling_rate",
-                    "comp",
-                ]:
-                    continue
-                elif "ch" in name:
-                    m_name = name.replace("ch", cc)
-                else:
-                    m_name = "{0}_{1}".format(cc, name)
-                dtype_list.append((m_name, n_dtype[0]))
         ### make an empy data frame, for now just 1 set.
-        df = pd.DataFrame(np.zeros(1, dtype=dtype_list))
+        df = pd.DataFrame(np.zeros(1, dtype=schedule_meta_dtype))
 
         ### return a pandas series, easier to access than dataframe
         return df.iloc[0]
@@ -488,12 +528,10 @@ class Z3DCollection(object):
         if len(chn_list) == 5:
             return self.chn_order
         else:
-            chn_order = []
-            for chn_00 in self.chn_order:
-                for chn_01 in chn_list:
-                    if chn_00.lower() == chn_01.lower():
-                        chn_order.append(chn_00.lower())
-                        continue
+            chn_set = set([chn.lower() for chn in chn_list])
+            chn_order = [
+                chn.lower() for chn in self.chn_order if chn.lower() in chn_set
+            ]
 
             return chn_order
 
@@ -517,40 +555,8 @@ def create_empty_meta_arr():
     """
     Create an empty pandas Series
     """
-    dtypes = [
-        ("station", "U10"),
-        ("latitude", np.float),
-        ("longitude", np.float),
-        ("elevation", np.float),
-        ("start", np.int64),
-        ("stop", np.int64),
-        ("sampling_rate", np.float),
-        ("n_chan", np.int),
-        ("instrument_id", "U10"),
-        ("collected_by", "U30"),
-        ("notes", "U200"),
-    ]
-    ch_types = np.dtype(
-        [
-            ("ch_azimuth", np.float32),
-            ("ch_length", np.float32),
-            ("ch_num", np.int32),
-            ("ch_sensor", "U10"),
-            ("n_samples", np.int32),
-            ("t_diff", np.int32),
-            ("standard_deviation", np.float32),
-        ]
-    )
-
-    for cc in ["ex", "ey", "hx", "hy", "hz"]:
-        for name, n_dtype in ch_types.fields.items():
-            if "ch" in name:
-                m_name = name.replace("ch", cc)
-            else:
-                m_name = "{0}_{1}".format(cc, name)
-            dtypes.append((m_name, n_dtype[0]))
     ### make an empy data frame, for now just 1 set.
-    df = pd.DataFrame(np.zeros(1, dtype=dtypes))
+    df = pd.DataFrame(np.zeros(1, dtype=survey_meta_dtype))
 
     ### return a pandas series, easier to access than dataframe
     return df.iloc[0]
@@ -626,7 +632,7 @@ def read_pd_series(csv_fn):
     series = pd.read_csv(csv_fn, index_col=0, header=None, squeeze=True)
 
     return pd.DataFrame(
-        dict([(key, [value]) for key, value in zip(series.index, series.values)])
+        {key: [value] for key, value in zip(series.index, series.values)}
     )
 
 
@@ -648,24 +654,21 @@ def combine_station_runs(csv_dir):
         ]
     )
 
-    count = 0
-    for ii, csv_fn in enumerate(csv_fn_list):
-        if ii == 0:
-            run_df = read_pd_series(csv_fn)
+    if csv_fn_list == []:
+        return None, None
 
-        else:
-            run_df = run_df.append(read_pd_series(csv_fn), ignore_index=True)
-            count += 1
+    ### collect all the runs first and concatenate once, appending row by
+    ### row copies the entire data frame for every run.
+    run_df = pd.concat(
+        [read_pd_series(csv_fn) for csv_fn in csv_fn_list], ignore_index=True
+    )
 
     ### replace any None with 0, makes it easier
-    try:
-        run_df = run_df.replace("None", "0")
-    except UnboundLocalError:
-        return None, None
+    run_df = run_df.replace("None", "0")
 
     ### make lat and lon floats
-    run_df.latitude = run_df.latitude.astype(np.float)
-    run_df.longitude = run_df.longitude.astype(np.float)
+    run_df.latitude = run_df.latitude.astype(np.float64)
+    run_df.longitude = run_df.longitude.astype(np.float64)
 
     ### write combined csv file
     csv_fn = os.path.join(csv_dir, "{0}_runs.csv".format(station))
@@ -725,7 +728,7 @@ def combine_survey_csv(survey_dir, skip_stations=None):
     if not isinstance(skip_stations, list):
         skip_stations = [skip_stations]
 
-    count = 0
+    station_list = []
     for station in os.listdir(survey_dir):
         station_dir = os.path.join(survey_dir, station)
         if not os.path.isdir(station_dir):
@@ -738,15 +741,12 @@ def combine_survey_csv(survey_dir, skip_stations=None):
         if run_df is None:
             print("*** No Information for {0} ***".format(station))
             continue
-        if count == 0:
-            survey_df = pd.DataFrame(summarize_station_runs(run_df)).T
-            count += 1
-        else:
-            survey_df = survey_df.append(pd.DataFrame(summarize_station_runs(run_df)).T)
-            count += 1
+        station_list.append(pd.DataFrame(summarize_station_runs(run_df)).T)
 
-    survey_df.latitude = survey_df.latitude.astype(np.float)
-    survey_df.longitude = survey_df.longitude.astype(np.float)
+    ### concatenate once instead of appending a copy for each station
+    survey_df = pd.concat(station_list)
+    survey_df.latitude = survey_df.latitude.astype(np.float64)
+    survey_df.longitude = survey_df.longitude.astype(np.float64)
 
     csv_fn = os.path.join(survey_dir, "survey_summary.csv")
     survey_df.to_csv(csv_fn, index=False)
@@ -754,6 +754,23 @@ def combine_survey_csv(survey_dir, skip_stations=None):
     return survey_df, csv_fn
 
 
+@functools.lru_cache(maxsize=8)
+def _read_survey_csv(survey_csv, mtime):
+    """
+    read and clean a survey .csv file, cached on the file name and
+    modification time so an edited file is read again.  Use read_survey_csv,
+    this returns the cached database itself.
+    """
+    db = pd.read_csv(
+        survey_csv, dtype={"latitude": np.float64, "longitude": np.float64}
+    )
+    for key in ["hx_sensor", "hy_sensor", "hz_sensor"]:
+        db[key] = db[key].fillna(0)
+        db[key] = db[key].astype(np.int64)
+
+    return db
+
+
 def read_survey_csv(survey_csv):
     """
     Read in a survey .csv file that will overwrite existing metadata
@@ -765,12 +782,9 @@ def read_survey_csv(survey_csv):
     :return: survey summary database
     :rtype: pandas dataframe
     """
-    db = pd.read_csv(survey_csv, dtype={"latitude": np.float, "longitude": np.float})
-    for key in ["hx_sensor", "hy_sensor", "hz_sensor"]:
-        db[key] = db[key].fillna(0)
-        db[key] = db[key].astype(np.int)
-
-    return db
+    survey_csv = os.path.abspath(survey_csv)
+    ### return a copy so changes by the caller don't end up in the cache
+    return _read_survey_csv(survey_csv, os.stat(survey_csv).st_mtime_ns).copy()
 
 
 def get_station_info_from_csv(survey_csv, station):
@@ -812,15 +826,15 @@ def summarize_log_files(station_dir):
             continue
         lines.append("{0}{1}{0}".format("-" * 10, folder))
         with open(log_fn, "r") as fid:
-            log_lines = fid.readlines()
-            for log_line in log_lines:
-                if "xxx" in log_line:
-                    lines.append(log_line)
-                elif "error" in log_line.lower():
-                    lines.append(log_line)
+            lines.extend(
+                log_line
+                for log_line in fid
+                if "xxx" in log_line or "error" in log_line.lower()
+            )
 
-        with open(summary_fn, "w") as fid:
-            fid.write("\n".join(lines))
+    ### write the summary once all the log files have been read
+    with open(summary_fn, "w") as fid:
+        fid.write("\n".join(lines))
 
     return summary_fn
 
@@ -838,6 +852,11 @@ def write_shp_file(survey_csv_fn, save_path=None):
         :return: full path to shape files
         :rtype: string
         """
+    ### geopandas is slow to import and only needed here, so import it on
+    ### first use rather than every time the archive module is loaded
+    import geopandas as gpd
+    from shapely.geometry import Point
+
     if save_path is not None:
         save_fn = save_path
     else:
@@ -936,13 +955,16 @@ def sb_sort_fn_list(fn_list):
     fn_list_sort = [None, None, None]
     index_dict = {"xml": 0, "edi": 1, "png": 2}
 
-    for ext in ["xml", "edi", "png"]:
-        for fn in fn_list:
-            if fn.endswith(ext):
-                fn_list_sort[index_dict[ext]] = fn
-                fn_list.remove(fn)
-                break
-    fn_list_sort += sorted(fn_list)
+    ### one pass through the list, the first file of each type goes in its
+    ### slot and everything else is sorted on the end
+    fn_other = []
+    for fn in fn_list:
+        index = index_dict.get(fn[-3:])
+        if index is not None and fn_list_sort[index] is None:
+            fn_list_sort[index] = fn
+        else:
+            fn_other.append(fn)
+    fn_list_sort += sorted(fn_other)
 
     # check to make sure all the files are there
     if fn_list_sort[0] is None:
@@ -1044,6 +1066,10 @@ def sb_upload_data(
                                                 r"/home/mt/archive_station",
                                                 'jdoe@usgs.gov')
     """
+    ### sciencebasepy is only needed to upload, so import it here rather than
+    ### every time the archive module is loaded
+    import sciencebasepy as sb
+
     ### initialize a session
     session = sb.SbSession()
 
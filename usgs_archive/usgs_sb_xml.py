@@ -276,28 +276,30 @@ class XMLMetadata(object):
         """
         Read in configuration file
         """
-        # read in the configuration file
+        # read in the configuration file a line at a time
         with open(config_fn, "r") as fid:
-            lines = fid.readlines()
-
-        for line in lines:
-            # skip comment lines
-            if line.find("#") == 0 or len(line.strip()) < 2:
-                continue
-            # make a key = value pair
-            key, value = [item.strip() for item in line.split("=", 1)]
-            if value == "usgs_str":
-                value = self.usgs_str
-            if value.find("[") >= 0 and value.find("]") >= 0 and value.find("<") != 0:
-                value = value.replace("[", "").replace("]", "")
-                value = [v.strip() for v in value.split(",")]
-
-            # if there is a dot, meaning an object with an attribute separate
-            if key.find(".") > 0:
-                obj, obj_attr = key.split(".")
-                setattr(getattr(self, obj), obj_attr, value)
-            else:
-                setattr(self, key, value)
+            for line in fid:
+                # skip comment lines
+                if line.startswith("#") or len(line.strip()) < 2:
+                    continue
+                # make a key = value pair
+                key, value = [item.strip() for item in line.split("=", 1)]
+                if value == "usgs_str":
+                    value = self.usgs_str
+                if (
+                    value.find("[") >= 0
+                    and value.find("]") >= 0
+                    and value.find("<") != 0
+                ):
+                    value = value.replace("[", "").replace("]", "")
+                    value = [v.strip() for v in value.split(",")]
+
+                # if there is a dot, meaning an object with an attribute separate
+                if key.find(".") > 0:
+                    obj, obj_attr = key.split(".")
+                    setattr(getattr(self, obj), obj_attr, value)
+                else:
+                    setattr(self, key, value)
 
     def _set_id_info(self):
         """